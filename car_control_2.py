@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import os
 import time
 import serial
 import serial.tools.list_ports
@@ -6,6 +7,8 @@ import serial.tools.list_ports
 
 # auto-detect Arduino port
 def find_arduino():
+    if os.environ.get("ARDUINO_PORT"):
+        return os.environ["ARDUINO_PORT"]
     ports = list(serial.tools.list_ports.comports())
     for port in ports:
         if (
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
+import os
 import time
 
 import serial
 
 if __name__ == '__main__':
-    ser = serial.Serial('/dev/ttyUSB0', 9600, timeout=1.0) # use ls /dev/tty* to find the Arduino USB, and connect to the same port with Arduino.
+    ser = serial.Serial(os.environ.get('ARDUINO_PORT', '/dev/ttyUSB0'), 9600, timeout=1.0) # use ls /dev/tty* to find the Arduino USB, and connect to the same port with Arduino.
     #time.sleep(3)
     ser.reset_input_buffer()
     
@@ -13,6 +13,8 @@ from picamera2 import Picamera2, Preview
 
 def find_arduino():
     """自动查找Arduino端口"""
+    if os.environ.get("ARDUINO_PORT"):
+        return os.environ["ARDUINO_PORT"]
     ports = list(serial.tools.list_ports.comports())
     for port in ports:
         if "Arduino" in port.description or "ttyUSB" in port.device or "ttyACM" in port.device:
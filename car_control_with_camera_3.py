@@ -11,6 +11,8 @@ import os  # Add this import for os.environ
 
 def find_arduino():
     """Automatically finds the Arduino port."""
+    if os.environ.get("ARDUINO_PORT"):
+        return os.environ["ARDUINO_PORT"]
     ports = list(serial.tools.list_ports.comports())
     for port in ports:
         if "Arduino" in port.description or "ttyUSB" in port.device or "ttyACM" in port.device:
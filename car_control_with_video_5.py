@@ -7,11 +7,17 @@ import serial.tools.list_ports
 import torch
 import numpy as np
 import os
+import argparse
+import contextlib
 from ultralytics import YOLO
+from session_recorder import SessionRecorder
+from latency_tracer import LatencyTracer
 
 
 # auto detect arduino port
 def find_arduino():
+    if os.environ.get("ARDUINO_PORT"):
+        return os.environ["ARDUINO_PORT"]
     ports = list(serial.tools.list_ports.comports())
     for port in ports:
         if (
@@ -23,47 +29,79 @@ def find_arduino():
     return None
 
 
+# time a pipeline stage of the current frame when tracing is enabled
+def trace_span(name):
+    if tracer:
+        return tracer.span(trace_id, name)
+    return contextlib.nullcontext()
+
+
 # send command to arduino
 def send_command(command):
     try:
-        ser.write((command + "\n").encode())  # send command to Arduino
+        with trace_span("serial_write"):
+            ser.write((command + "\n").encode())  # send command to Arduino
         print(f"Sent: {command}")
-        time.sleep(0.1)  # wait for command to be processed
-        response = ser.readline().decode("utf-8").strip()  # read response from Arduino
-        if response:
-            print(f"Arduino: {response}")
+        if recorder:
+            recorder.record_tx(command)
+        with trace_span("serial_reply"):
+            time.sleep(0.1)  # wait for command to be processed
+            response = read_action_line(command)
+        if tracer:
+            # the action line is printed after the motors are set
+            tracer.command(trace_id, command, "ack" if response else "timeout")
         return response
     except Exception as e:
         print(f"Error sending command: {e}")
         return None
 
 
+# read until the line that follows our command's "Received:" echo
+def read_action_line(command, timeout=1.5):
+    echoed = False
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        line = ser.readline().decode("utf-8").strip()  # read response from Arduino
+        if not line:
+            continue
+        print(f"Arduino: {line}")
+        if recorder:
+            recorder.record_rx(line)
+        if line == f"Received: {command}":
+            echoed = True
+        elif echoed:
+            return line
+    return None
+
+
 # recognize text from image
 def recognize_text(frame):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    with trace_span("preprocess"):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
 
-    # Increase contrast
-    gray = cv2.equalizeHist(gray)
+        # Increase contrast
+        gray = cv2.equalizeHist(gray)
 
-    # Apply Gaussian blur to reduce noise
-    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        # Apply Gaussian blur to reduce noise
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
 
-    # Adaptive thresholding for better segmentation
-    processed = cv2.adaptiveThreshold(
-        blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2
-    )
+        # Adaptive thresholding for better segmentation
+        processed = cv2.adaptiveThreshold(
+            blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2
+        )
 
-    # Morphological operations to remove noise and strengthen text
-    kernel = np.ones((3, 3), np.uint8)
-    processed = cv2.morphologyEx(processed, cv2.MORPH_CLOSE, kernel)
+        # Morphological operations to remove noise and strengthen text
+        kernel = np.ones((3, 3), np.uint8)
+        processed = cv2.morphologyEx(processed, cv2.MORPH_CLOSE, kernel)
 
-    # Save processed image occasionally for debugging
-    if int(time.time()) % 30 < 1:
-        cv2.imwrite(f"processed_text_{int(time.time())}.jpg", processed)
+        # Save processed image occasionally for debugging
+        if int(time.time()) % 30 < 1:
+            cv2.imwrite(f"processed_text_{int(time.time())}.jpg", processed)
 
     # Use OCR with a whitelist of valid characters
     custom_config = r"--psm 6 -c tessedit_char_whitelist=WASDXFORWARDBACKLEFTRIGHTSTOP"
-    text = pytesseract.image_to_string(processed, config=custom_config).strip().upper()
+    with trace_span("ocr"):
+        text = pytesseract.image_to_string(processed, config=custom_config).strip().upper()
 
     return text
 
@@ -102,6 +140,18 @@ def detect_person(frame, model, min_size=100, confidence_threshold=0.5):
     return person_detected, person_box
 
 
+# optional session recording, e.g. --record session.rec
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--record", help="log frames, detections and serial traffic to this file"
+)
+parser.add_argument(
+    "--trace", help="write a latency trace (Perfetto / chrome://tracing JSON) here"
+)
+args = parser.parse_args()
+if args.record and os.path.exists(args.record) and os.path.getsize(args.record) > 0:
+    parser.error(f"{args.record} already holds a recording, choose a new file")
+
 # Configure for headless operation
 os.environ["OPENCV_VIDEOIO_PRIORITY_MSMF"] = "0"
 os.environ["QT_QPA_PLATFORM"] = "offscreen"
@@ -112,6 +162,10 @@ if not arduino_port:
     print("No Arduino found! Please check the connection.")
     exit(1)
 
+recorder = SessionRecorder(args.record) if args.record else None
+tracer = LatencyTracer() if args.trace else None
+trace_id = None
+
 try:
     ser = serial.Serial(arduino_port, 9600, timeout=1)
     time.sleep(2)
@@ -136,14 +190,22 @@ try:
     # Counter for command stability
     text_command_counter = 0
     last_text_command = ""
+    text_trace_id = None  # trace of the frame where the command was first seen
 
     print("System running. Press Ctrl+C to exit.")
 
     while True:
-        frame = picam2.capture_array()  # capture frame from camera
-        frame = cv2.cvtColor(
-            frame, cv2.COLOR_RGB2BGR
-        )  # convert to BGR format for OpenCV
+        request = picam2.capture_request()  # capture frame with its metadata
+        frame = request.make_array("main")
+        sensor_timestamp = request.get_metadata().get("SensorTimestamp")
+        request.release()
+        if tracer:
+            trace_id = tracer.start_trace(sensor_timestamp)
+
+        with trace_span("convert"):
+            frame = cv2.cvtColor(
+                frame, cv2.COLOR_RGB2BGR
+            )  # convert to BGR format for OpenCV
 
         current_time = time.time()
 
@@ -152,54 +214,69 @@ try:
             cv2.imwrite(f"raw_frame_{int(current_time)}.jpg", frame)
 
         # detect person
-        person_detected, person_box = detect_person(frame, model)
+        with trace_span("yolo"):
+            person_detected, person_box = detect_person(frame, model)
 
         # Process text commands
         text = recognize_text(frame)
-        if text:
-            print(f"Recognized: {text}")
-
-            # Determine command from text
-            command = None
-            if "STOP" in text:
-                command = "x"
-            elif "W" in text or "FORWARD" in text:
-                command = "w"
-            elif "S" in text or "BACK" in text:
-                command = "s"
-            elif "A" in text or "LEFT" in text:
-                command = "a"
-            elif "D" in text or "RIGHT" in text:
-                command = "d"
-
-            # If valid command found
-            if command:
-                # Check for command stability (same command detected multiple times)
-                if command == last_text_command:
-                    text_command_counter += 1
-                else:
-                    text_command_counter = 1
-                    last_text_command = command
-
-                # If command is stable (detected 3 times in a row)
-                if text_command_counter >= 3:
-                    follow_mode = False  # disable follow mode
-                    if current_time - last_command_time > command_cooldown:
-                        send_command(command)
-                        last_command_time = current_time
-                        text_command_counter = 0  # Reset after sending command
-
-        # Handle person follow mode
-        if follow_mode and person_detected:
-            print("Person detected, following...")
-            if current_time - last_command_time > command_cooldown:
-                send_command("follow")
-                last_command_time = current_time
-        elif follow_mode and not person_detected:
-            print("No person detected, stopping...")
-            if current_time - last_command_time > command_cooldown:
-                send_command("x")
-                last_command_time = current_time
+
+        if recorder:
+            recorder.record_frame(frame, current_time)
+            recorder.record_detection(
+                {"person": person_detected, "box": person_box, "text": text},
+                current_time,
+            )
+        # serial spans nest inside and are reported separately
+        with trace_span("arbitration"):
+            if text:
+                print(f"Recognized: {text}")
+
+                # Determine command from text
+                command = None
+                if "STOP" in text:
+                    command = "x"
+                elif "W" in text or "FORWARD" in text:
+                    command = "w"
+                elif "S" in text or "BACK" in text:
+                    command = "s"
+                elif "A" in text or "LEFT" in text:
+                    command = "a"
+                elif "D" in text or "RIGHT" in text:
+                    command = "d"
+
+                # If valid command found
+                if command:
+                    # Check for command stability (same command detected multiple times)
+                    if command == last_text_command:
+                        text_command_counter += 1
+                    else:
+                        text_command_counter = 1
+                        last_text_command = command
+                    if text_command_counter == 1:
+                        text_trace_id = trace_id
+
+                    # If command is stable (detected 3 times in a row)
+                    if text_command_counter >= 3:
+                        follow_mode = False  # disable follow mode
+                        if current_time - last_command_time > command_cooldown:
+                            if tracer:
+                                # measure from the first sighting, not the third
+                                tracer.debounce(trace_id, text_trace_id)
+                            send_command(command)
+                            last_command_time = current_time
+                            text_command_counter = 0  # Reset after sending command
+
+            # Handle person follow mode
+            if follow_mode and person_detected:
+                print("Person detected, following...")
+                if current_time - last_command_time > command_cooldown:
+                    send_command("follow")
+                    last_command_time = current_time
+            elif follow_mode and not person_detected:
+                print("No person detected, stopping...")
+                if current_time - last_command_time > command_cooldown:
+                    send_command("x")
+                    last_command_time = current_time
 
         # Short sleep to prevent CPU overload
         time.sleep(0.1)
@@ -209,7 +286,16 @@ except serial.SerialException as e:
 except KeyboardInterrupt:
     print("\nExiting...")
 finally:
-    picam2.close()
+    # save the recording and trace first, even if setup failed part way
+    if recorder:
+        recorder.close()
+        print(f"Session recorded to {args.record}")
+    if tracer:
+        tracer.report()
+        tracer.export_chrome_trace(args.trace)
+        print(f"Latency trace written to {args.trace}")
+    if "picam2" in locals():
+        picam2.close()
     if "ser" in locals() and ser.is_open:
         ser.close()
         print("Serial connection closed.")
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""Simulated Arduino_car_2 on a virtual serial port, no hardware needed.
+
+Opens a pty and answers it the way Arduino_car_2.ino does, with the same
+command set (w/s/a/d/x/follow/distance) and replies. It also models:
+
+  - serial transfer time at the configured baud rate (10 bits per byte);
+    replies go through a 64-byte TX buffer that drains in the background,
+    so Serial.print() only blocks the sketch when that buffer is full
+  - the pulseIn() stall in getDistance(): the echo time, or the HC-SR04's
+    ~38 ms no-echo pulse (read as ~646 cm) when nothing is in range
+  - with --sensor-fault, an echo pin that never goes high: pulseIn() times
+    out after 1 s and returns 0 cm, so moveForward() always stops
+  - the 15 cm obstacle cutoff in moveForward()
+  - differential-drive kinematics from the PWM values each command sets
+  - an ultrasonic sensor ray-cast against the arena walls and obstacles
+
+Run it, then point a control script at the printed device:
+
+    python3 car_simulator.py --link /tmp/ttyCAR
+    ARDUINO_PORT=/tmp/ttyCAR python3 car_control_2.py
+"""
+import argparse
+import math
+import os
+import queue
+import select
+import threading
+import time
+import tty
+
+BAUD_RATE = 9600
+BITS_PER_BYTE = 10  # 8N1: start bit + 8 data bits + stop bit
+TX_BUFFER = 64  # bytes, HardwareSerial's transmit ring buffer
+
+SOUND_CM_PER_US = 0.034
+PULSE_IN_TIMEOUT = 1.0  # pulseIn() default timeout in seconds
+NO_ECHO_PULSE = 38000  # us, HC-SR04 echo width when nothing comes back
+SENSOR_MAX_RANGE = 400  # cm, HC-SR04 gives no echo beyond this
+OBSTACLE_DISTANCE = 15  # cm, cutoff in moveForward()
+COMMAND_SPEED = 150  # PWM value used by every command in loop()
+
+# rough Elegoo V4 figures
+CM_PER_SEC_AT_FULL_PWM = 60.0
+WHEEL_BASE = 14.0  # cm
+CAR_LENGTH = 20.0  # cm, sensor sits on the front bumper
+
+
+class World:
+    def __init__(self, width=300.0, height=200.0, obstacles=()):
+        self.width = width
+        self.height = height
+        # axis-aligned boxes: (x1, y1, x2, y2) in cm
+        self.obstacles = list(obstacles)
+
+    def ray_distance(self, x, y, heading):
+        """Distance in cm from (x, y) along heading to the nearest surface."""
+        dx, dy = math.cos(heading), math.sin(heading)
+        boxes = [(0.0, 0.0, self.width, self.height)] + self.obstacles
+        best = math.inf
+        for i, (x1, y1, x2, y2) in enumerate(boxes):
+            hit = _ray_box(x, y, dx, dy, x1, y1, x2, y2, inside=(i == 0))
+            if hit is not None and hit < best:
+                best = hit
+        return best
+
+    def collides(self, x, y):
+        if not (0 <= x <= self.width and 0 <= y <= self.height):
+            return True
+        return any(x1 <= x <= x2 and y1 <= y <= y2 for x1, y1, x2, y2 in self.obstacles)
+
+
+def _ray_box(x, y, dx, dy, x1, y1, x2, y2, inside):
+    # slab intersection; for the arena itself we want the exit point
+    t_near, t_far = -math.inf, math.inf
+    for origin, direction, low, high in ((x, dx, x1, x2), (y, dy, y1, y2)):
+        if abs(direction) < 1e-12:
+            if not low <= origin <= high:
+                return None
+            continue
+        t1 = (low - origin) / direction
+        t2 = (high - origin) / direction
+        t_near = max(t_near, min(t1, t2))
+        t_far = min(t_far, max(t1, t2))
+    if t_near > t_far or t_far < 0:
+        return None
+    if inside:
+        return t_far
+    return t_near if t_near >= 0 else 0.0
+
+
+class SimulatedCar:
+    """State of Arduino_car_2: motor pins plus pose in the world."""
+
+    def __init__(self, world, x=None, y=None, heading=0.0):
+        self.world = world
+        self.x = world.width / 2 if x is None else x
+        self.y = world.height / 2 if y is None else y
+        self.heading = heading  # radians, 0 = +x
+        self.pwm_right = 0  # PWMA
+        self.pwm_left = 0  # PWMB
+        self.dir_right = True  # AIN HIGH = forward
+        self.dir_left = True  # BIN HIGH = forward
+        self.lock = threading.Lock()
+
+    def step(self, dt):
+        with self.lock:
+            right = self.pwm_right / 255 * CM_PER_SEC_AT_FULL_PWM
+            left = self.pwm_left / 255 * CM_PER_SEC_AT_FULL_PWM
+            right = right if self.dir_right else -right
+            left = left if self.dir_left else -left
+            speed = (right + left) / 2
+            turn_rate = (right - left) / WHEEL_BASE
+
+            heading = self.heading + turn_rate * dt
+            x = self.x + speed * math.cos(heading) * dt
+            y = self.y + speed * math.sin(heading) * dt
+            front_x = x + CAR_LENGTH / 2 * math.cos(heading)
+            front_y = y + CAR_LENGTH / 2 * math.sin(heading)
+            self.heading = heading
+            if not self.world.collides(front_x, front_y):
+                self.x, self.y = x, y
+
+    def sensor_distance(self):
+        """Ground-truth distance from the front bumper, or inf if out of range."""
+        with self.lock:
+            front_x = self.x + CAR_LENGTH / 2 * math.cos(self.heading)
+            front_y = self.y + CAR_LENGTH / 2 * math.sin(self.heading)
+            distance = self.world.ray_distance(front_x, front_y, self.heading)
+        return distance if distance <= SENSOR_MAX_RANGE else math.inf
+
+    def set_motors(self, pwm_right, pwm_left, forward):
+        with self.lock:
+            self.pwm_right = pwm_right
+            self.pwm_left = pwm_left
+            self.dir_right = self.dir_left = forward
+
+
+class Firmware:
+    """Command handling from Arduino_car_2.ino, with its timing."""
+
+    def __init__(
+        self, car, fd, baud_rate=BAUD_RATE, verbose=False, sensor_fault=False
+    ):
+        self.car = car
+        self.fd = fd
+        self.byte_time = BITS_PER_BYTE / baud_rate
+        self.verbose = verbose
+        self.sensor_fault = sensor_fault
+        self._tx = bytearray()
+        self._tx_ready = threading.Condition()
+        self._rx = queue.Queue()
+
+    def println(self, line):
+        data = (line + "\r\n").encode()
+        with self._tx_ready:
+            for byte in data:
+                # Serial.write() returns at once unless the ring buffer is full
+                while len(self._tx) >= TX_BUFFER:
+                    self._tx_ready.notify_all()
+                    self._tx_ready.wait()
+                self._tx.append(byte)
+            self._tx_ready.notify_all()
+
+    def _transmit(self, stop_event):
+        # the UART: bytes leave the buffer one wire-time after another
+        while not stop_event.is_set():
+            with self._tx_ready:
+                if not self._tx:
+                    self._tx_ready.wait(0.1)
+                    continue
+                chunk = bytes(self._tx[:8])
+            time.sleep(len(chunk) * self.byte_time)
+            with self._tx_ready:
+                del self._tx[: len(chunk)]
+                self._tx_ready.notify_all()
+            os.write(self.fd, chunk)
+
+    def _receive(self, stop_event):
+        # the pty delivers instantly; stamp each chunk with when its last
+        # byte would have arrived on a real wire
+        wire_free = 0.0
+        while not stop_event.is_set():
+            ready, _, _ = select.select([self.fd], [], [], 0.1)
+            if not ready:
+                continue
+            try:
+                data = os.read(self.fd, 256)
+            except OSError:
+                time.sleep(0.1)
+                continue  # no client attached to the slave side yet
+            wire_free = max(time.monotonic(), wire_free) + len(data) * self.byte_time
+            self._rx.put((wire_free, data))
+
+    def get_distance(self):
+        # trigger pulse, then pulseIn() waits for the echo to come back
+        if self.sensor_fault:
+            time.sleep(PULSE_IN_TIMEOUT)
+            return 0  # echo pin never went high, pulseIn() timed out
+        distance = self.car.sensor_distance()
+        if math.isinf(distance):
+            duration = NO_ECHO_PULSE
+        else:
+            duration = distance * 2 / SOUND_CM_PER_US  # microseconds
+        time.sleep(12e-6 + duration / 1e6)
+        return int(duration * SOUND_CM_PER_US / 2)
+
+    def stop_car(self):
+        self.car.set_motors(0, 0, True)
+        self.println("Car Stopped")
+
+    def handle(self, command):
+        command = command.strip()
+        if not command:
+            return
+        if self.verbose:
+            print(f"Received: {command}")
+        self.println(f"Received: {command}")
+
+        if command in ("w", "follow"):
+            if self.get_distance() < OBSTACLE_DISTANCE:
+                self.stop_car()
+                self.println("Obstacle detected! Stopping.")
+                return
+            self.car.set_motors(COMMAND_SPEED, COMMAND_SPEED, True)
+            self.println("Moving Forward")
+        elif command == "s":
+            self.car.set_motors(COMMAND_SPEED, COMMAND_SPEED, False)
+            self.println("Moving Backward")
+        # the sketch's pin labels put the slower wheel on the left for "d"
+        # and the right for "a"; modelled as written, not as named
+        elif command == "a":
+            self.car.set_motors(COMMAND_SPEED // 2, COMMAND_SPEED, True)
+            self.println("Turning Left")
+        elif command == "d":
+            self.car.set_motors(COMMAND_SPEED, COMMAND_SPEED // 2, True)
+            self.println("Turning Right")
+        elif command == "x":
+            self.stop_car()
+        elif command == "distance":
+            distance = self.get_distance()
+            self.println(f"Distance: {distance}")
+        else:
+            self.println("Invalid command")
+
+    def run(self, stop_event):
+        for target in (self._transmit, self._receive):
+            threading.Thread(target=target, args=(stop_event,), daemon=True).start()
+        self.println("Arduino Ready")
+        buffer = b""
+        while not stop_event.is_set():
+            try:
+                arrival, data = self._rx.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            # input that came in while a command was running is already here
+            delay = arrival - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            buffer += data
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                self.handle(line.decode("utf-8", errors="replace"))
+
+
+def open_virtual_port(link=None):
+    """Create a pty pair; returns (master_fd, slave_fd, device_path)."""
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(slave_fd)  # no echo or newline translation, like a USB serial port
+    device = os.ttyname(slave_fd)
+    if link:
+        if os.path.islink(link):
+            os.remove(link)
+        os.symlink(device, link)
+        device = link
+    return master_fd, slave_fd, device
+
+
+def physics_loop(car, stop_event, rate=50):
+    dt = 1.0 / rate
+    last = time.monotonic()
+    while not stop_event.is_set():
+        time.sleep(dt)
+        now = time.monotonic()
+        car.step(now - last)
+        last = now
+
+
+def parse_obstacle(text):
+    values = [float(v) for v in text.split(",")]
+    if len(values) != 4:
+        raise argparse.ArgumentTypeError("obstacle must be x1,y1,x2,y2")
+    return tuple(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Arduino_car_2 on a pty")
+    parser.add_argument("--baud", type=int, default=BAUD_RATE)
+    parser.add_argument("--link", help="also expose the port at this path")
+    parser.add_argument("--width", type=float, default=300.0, help="arena width, cm")
+    parser.add_argument("--height", type=float, default=200.0, help="arena height, cm")
+    parser.add_argument(
+        "--obstacle",
+        type=parse_obstacle,
+        action="append",
+        default=[],
+        help="box x1,y1,x2,y2 in cm (repeatable)",
+    )
+    parser.add_argument(
+        "--sensor-fault",
+        action="store_true",
+        help="echo pin stuck low: every reading times out as 0 cm",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    world = World(args.width, args.height, args.obstacle)
+    car = SimulatedCar(world)
+    master_fd, slave_fd, device = open_virtual_port(args.link)
+    firmware = Firmware(car, master_fd, args.baud, args.verbose, args.sensor_fault)
+
+    stop_event = threading.Event()
+    threading.Thread(target=physics_loop, args=(car, stop_event), daemon=True).start()
+    print(f"Simulated car on {device} at {args.baud} baud. Press Ctrl+C to exit.")
+
+    threading.Thread(target=firmware.run, args=(stop_event,), daemon=True).start()
+
+    try:
+        last_report = 0
+        while True:
+            time.sleep(0.1)
+            if args.verbose and time.monotonic() - last_report > 1.0:
+                last_report = time.monotonic()
+                print(
+                    f"pose x={car.x:.1f} y={car.y:.1f} "
+                    f"heading={math.degrees(car.heading):.0f} "
+                    f"sensor={car.sensor_distance():.0f} cm"
+                )
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    finally:
+        stop_event.set()
+        os.close(master_fd)
+        os.close(slave_fd)
+        if args.link and os.path.islink(args.link):
+            os.remove(args.link)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Low-latency manual driving from the keyboard.
+
+Hold w/a/s/d (or the arrow keys) to drive, release to stop. Space stops
+immediately, q quits.
+
+Keys are read raw and without blocking. Terminals report no key-up
+events, so a key counts as held while its auto-repeat keeps arriving.
+Until the first repeat it is given --repeat-delay seconds (longer than the
+660 ms X11 and 600 ms labwc defaults), after that only --release-timeout
+seconds, a few repeat intervals, so the car stops soon after release.
+
+Commands are streamed at a fixed rate but coalesced: only the latest
+wanted command is sent, and only once the Arduino has answered the
+previous one, so the 9600-baud link never queues up. Moving commands are
+re-sent each tick so moveForward() keeps checking for obstacles. Distance
+is polled in the gaps and shown live by a background reader.
+"""
+import argparse
+import os
+import select
+import sys
+import termios
+import threading
+import time
+import tty
+
+import serial
+import serial.tools.list_ports
+
+KEY_COMMANDS = {
+    "w": "w",
+    "s": "s",
+    "a": "a",
+    "d": "d",
+    "\x1b[A": "w",  # arrow up
+    "\x1b[B": "s",  # arrow down
+    "\x1b[D": "a",  # arrow left
+    "\x1b[C": "d",  # arrow right
+    "\x1bOA": "w",  # arrows in application cursor mode
+    "\x1bOB": "s",
+    "\x1bOD": "a",
+    "\x1bOC": "d",
+}
+COMMAND_NAMES = {"w": "forward", "s": "backward", "a": "left", "d": "right", "x": "stop"}
+
+# the line Arduino_car_2 prints last for each command
+FINAL_REPLIES = {
+    "w": ("Moving Forward", "Obstacle detected!"),
+    "s": ("Moving Backward",),
+    "a": ("Turning Left",),
+    "d": ("Turning Right",),
+    "x": ("Car Stopped",),
+    "distance": ("Distance:",),
+}
+REPLY_TIMEOUT = 1.2  # covers a 1 s pulseIn() timeout from a faulty sensor
+
+
+# auto-detect Arduino port
+def find_arduino():
+    if os.environ.get("ARDUINO_PORT"):
+        return os.environ["ARDUINO_PORT"]
+    ports = list(serial.tools.list_ports.comports())
+    for port in ports:
+        if (
+            "Arduino" in port.description
+            or "ttyUSB" in port.device
+            or "ttyACM" in port.device
+        ):
+            return port.device
+    return None
+
+
+class ArduinoLink:
+    """Serial link with a background reader and one command in flight."""
+
+    def __init__(self, ser):
+        self.ser = ser
+        self.distance = None
+        self.last_reply = ""
+        self.sent = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        self._sent_at = 0
+        self._pending = None
+        self._running = True
+        self._thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self._thread.start()
+
+    def idle(self):
+        # don't wait forever on a lost reply
+        waited = time.monotonic() - self._sent_at
+        if not self._idle.is_set() and waited > REPLY_TIMEOUT:
+            self._idle.set()
+        return self._idle.is_set()
+
+    def send(self, command):
+        self._pending = command
+        self._idle.clear()
+        self._sent_at = time.monotonic()
+        self.ser.write((command + "\n").encode())
+        self.sent += 1
+
+    def _reader_loop(self):
+        while self._running:
+            try:
+                line = self.ser.readline().decode("utf-8", errors="replace").strip()
+            except serial.SerialException:
+                break
+            if not line:
+                continue
+            if line.startswith("Distance:"):
+                try:
+                    self.distance = int(line.split(":")[1].strip())
+                except ValueError:
+                    pass
+            if line.startswith("Received:"):
+                continue
+            self.last_reply = line
+            # only the reply that ends the pending command frees the link;
+            # "Car Stopped" before "Obstacle detected!" or a late line
+            # from an earlier command must not
+            final = FINAL_REPLIES.get(self._pending, ())
+            if line.startswith(final) or line == "Invalid command":
+                self._pending = None
+                self._idle.set()
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=self.ser.timeout or 1)
+
+
+def read_keys():
+    """Return the keys pressed since the last call, without blocking.
+
+    Escape sequences come back whole; only plain arrows are in KEY_COMMANDS,
+    so modified arrows, function keys and the like are ignored.
+    """
+    data = ""
+    while select.select([sys.stdin], [], [], 0)[0]:
+        chunk = os.read(sys.stdin.fileno(), 64).decode(errors="ignore")
+        if not chunk:
+            break
+        data += chunk
+
+    keys = []
+    i = 0
+    while i < len(data):
+        if data[i] != "\x1b":
+            keys.append(data[i].lower())
+            i += 1
+            continue
+        end = i + 1
+        if data.startswith("[", end):
+            # CSI: parameter and intermediate bytes, then one final byte
+            end += 1
+            while end < len(data) and not "\x40" <= data[end] <= "\x7e":
+                end += 1
+            end += 1
+        elif data.startswith("O", end):
+            end += 2  # SS3: one final byte
+        # a lone or cut-off escape is dropped rather than read as letters
+        keys.append(data[i:end])
+        i = end
+    return keys
+
+
+def show_status(link, held, previous):
+    """Redraw the status line if it changed; returns what is shown."""
+    distance = f"{link.distance} cm" if link.distance is not None else "--"
+    action = COMMAND_NAMES[held] if held else "stopped"
+    status = (
+        f"{action:<9} | distance {distance:>7} | sent {link.sent:>5} | "
+        f"{link.last_reply[:30]:<30}"
+    )
+    if status != previous:
+        sys.stdout.write("\r" + status)
+        sys.stdout.flush()
+    return status
+
+
+def drive(link, rate, repeat_delay, release_timeout, distance_interval):
+    held = None
+    repeating = False
+    last_key_time = 0
+    last_sent = "x"
+    next_tick = time.monotonic()
+    last_distance_poll = 0
+    status = ""
+
+    while True:
+        for key in read_keys():
+            if key == "q":
+                return
+            if key == " ":
+                held = None
+                repeating = False
+                last_key_time = 0
+            elif key in KEY_COMMANDS:
+                # a second press of the held key means auto-repeat has begun
+                repeating = KEY_COMMANDS[key] == held
+                held = KEY_COMMANDS[key]
+                last_key_time = time.monotonic()
+
+        now = time.monotonic()
+        timeout = release_timeout if repeating else repeat_delay
+        if held and now - last_key_time > timeout:
+            held = None  # auto-repeat stopped: key released
+            repeating = False
+
+        wanted = held or "x"
+        if link.idle():
+            if wanted != last_sent or (wanted != "x" and now >= next_tick):
+                # coalesced: whatever is wanted right now, never a backlog
+                link.send(wanted)
+                last_sent = wanted
+                next_tick = now + 1.0 / rate
+            elif now - last_distance_poll >= distance_interval:
+                link.send("distance")
+                last_distance_poll = now
+
+        status = show_status(link, held, status)
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the car from the keyboard")
+    parser.add_argument(
+        "--rate", type=float, default=5.0, help="commands per second while a key is held"
+    )
+    parser.add_argument(
+        "--repeat-delay",
+        type=float,
+        default=0.75,
+        help="seconds to wait for the first key repeat before stopping",
+    )
+    parser.add_argument(
+        "--release-timeout",
+        type=float,
+        default=0.1,
+        help="seconds without key repeat before stopping, once it has started",
+    )
+    parser.add_argument(
+        "--distance-interval",
+        type=float,
+        default=0.5,
+        help="seconds between distance polls",
+    )
+    args = parser.parse_args()
+
+    # find Arduino port
+    arduino_port = find_arduino()
+    if not arduino_port:
+        print("No Arduino found! Please check the connection.")
+        exit(1)
+
+    if not sys.stdin.isatty():
+        print("Teleop needs an interactive terminal.")
+        exit(1)
+
+    old_settings = termios.tcgetattr(sys.stdin)
+    link = None
+    try:
+        ser = serial.Serial(arduino_port, 9600, timeout=0.1)
+        time.sleep(2)  # wait for Arduino to reset
+        ser.reset_input_buffer()
+        print(f"Connected to Arduino on {arduino_port}")
+        print("Hold w/a/s/d or arrows to drive, space to stop, q to quit.")
+
+        link = ArduinoLink(ser)
+        tty.setcbreak(sys.stdin.fileno())
+        drive(
+            link,
+            args.rate,
+            args.repeat_delay,
+            args.release_timeout,
+            args.distance_interval,
+        )
+
+    except serial.SerialException as e:
+        print(f"\nSerial error: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
+        print("\nExiting...")
+        if link:
+            link.ser.write(b"x\n")  # never leave the car driving
+            link.close()
+        if "ser" in locals() and ser.is_open:
+            ser.close()
+            print("Serial connection closed.")
+
+
+if __name__ == "__main__":
+    main()
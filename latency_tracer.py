@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Photon-to-motor latency tracing for the camera control loop.
+
+Every captured frame gets a trace id. The trace starts at the camera's
+SensorTimestamp (start of exposure), so the first "capture" span covers
+exposure, readout and the ISP. Pipeline stages are timed with
+tracer.span(trace_id, name), and tracer.command() closes a trace when the
+Arduino prints the action line for the command that frame produced (after
+pulseIn() and the motor update), or when that reply never arrives.
+
+A sign command is only sent once several frames in a row agree, so the
+sign was first seen frames earlier. tracer.debounce() moves the start of
+the sending frame's trace back to that first frame and covers the gap
+with a "debounce" span, so the latency runs from the sign appearing to
+the car reacting, waits and cooldowns included.
+
+    tracer = LatencyTracer()
+    trace_id = tracer.start_trace(metadata["SensorTimestamp"])
+    with tracer.span(trace_id, "ocr"):
+        ...
+    tracer.debounce(trace_id, first_trace_id)  # sign commands only
+    tracer.command(trace_id, "w", "ack")  # or "timeout"
+
+tracer.report() prints per-command percentiles, timeout counts and a
+per-stage breakdown, and tracer.export_chrome_trace() writes JSON that
+opens in Perfetto (https://ui.perfetto.dev) or chrome://tracing.
+
+Usage:
+    python3 latency_tracer.py trace.json   # report from an exported trace
+"""
+import collections
+import contextlib
+import json
+import math
+import threading
+import time
+
+
+def now_ns():
+    # same clock as libcamera's SensorTimestamp (CLOCK_MONOTONIC)
+    return time.monotonic_ns()
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of an unsorted list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Trace:
+    def __init__(self, trace_id, start_ns):
+        self.trace_id = trace_id
+        self.start_ns = start_ns
+        self.spans = []  # [name, start_ns, end_ns, child_ns]
+        self.commands = []  # (command, outcome, end_ns)
+        self._stack = []
+
+
+class LatencyTracer:
+    def __init__(self, max_traces=10000):
+        self._traces = collections.OrderedDict()
+        self._max_traces = max_traces
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def start_trace(self, sensor_timestamp_ns=None):
+        """Begin a trace for a frame that has just been captured."""
+        captured = now_ns()
+        start = sensor_timestamp_ns if sensor_timestamp_ns else captured
+        with self._lock:
+            trace_id = self._next_id
+            self._next_id += 1
+            trace = Trace(trace_id, start)
+            trace.spans.append(["capture", start, captured, 0])
+            self._traces[trace_id] = trace
+            if len(self._traces) > self._max_traces:
+                self._traces.popitem(last=False)
+        return trace_id
+
+    @contextlib.contextmanager
+    def span(self, trace_id, name):
+        trace = self._traces.get(trace_id)
+        if trace is None:
+            yield
+            return
+        span = [name, now_ns(), None, 0]
+        trace._stack.append(span)
+        try:
+            yield
+        finally:
+            span[2] = now_ns()
+            trace._stack.pop()
+            if trace._stack:
+                # parents report their own time, not their children's
+                trace._stack[-1][3] += span[2] - span[1]
+            trace.spans.append(span)
+
+    def debounce(self, trace_id, first_trace_id, name="debounce"):
+        """Start trace_id at the earlier frame where its command was first seen."""
+        trace = self._traces.get(trace_id)
+        first = self._traces.get(first_trace_id)
+        if trace is None or first is None or first is trace:
+            return
+        # the frames in between fall inside this span; their stages stay
+        # in their own traces, so nothing is counted twice
+        trace.spans.append([name, first.start_ns, trace.start_ns, 0])
+        trace.start_ns = first.start_ns
+
+    def command(self, trace_id, command, outcome="ack", end_ns=None):
+        """Close the frame's trace; outcome is "ack" or "timeout"."""
+        trace = self._traces.get(trace_id)
+        if trace is not None:
+            trace.commands.append((command, outcome, end_ns or now_ns()))
+
+    def to_chrome_trace(self):
+        events = []
+        for trace in self._traces.values():
+            for name, start, end, child in trace.spans:
+                events.append(
+                    {
+                        "name": name,
+                        "cat": "pipeline",
+                        "ph": "X",
+                        "ts": start / 1000,
+                        "dur": (end - start) / 1000,
+                        "pid": 1,
+                        "tid": 1,
+                        "args": {
+                            "trace_id": trace.trace_id,
+                            "self_ms": (end - start - child) / 1e6,
+                        },
+                    }
+                )
+            for command, outcome, end in trace.commands:
+                events.append(
+                    {
+                        "name": f"command {command}",
+                        "cat": "command",
+                        "ph": "i",
+                        "s": "g",
+                        "ts": end / 1000,
+                        "pid": 1,
+                        "tid": 1,
+                        "args": {
+                            "trace_id": trace.trace_id,
+                            "outcome": outcome,
+                            "latency_ms": (end - trace.start_ns) / 1e6,
+                        },
+                    }
+                )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def report(self):
+        print_report(self.to_chrome_trace()["traceEvents"])
+
+
+def print_report(events):
+    """Print latency percentiles from chrome trace events."""
+    spans = collections.defaultdict(list)
+    for event in events:
+        if event["ph"] == "X":
+            spans[event["args"]["trace_id"]].append(event)
+
+    latencies = collections.defaultdict(list)
+    timeouts = collections.Counter()
+    stages = collections.defaultdict(lambda: collections.defaultdict(list))
+    for event in events:
+        if event["ph"] != "i":
+            continue
+        command = event["name"].split(" ", 1)[1]
+        if event["args"].get("outcome") == "timeout":
+            # no reply means no latency to report; count it, don't hide it
+            timeouts[command] += 1
+            continue
+        latencies[command].append(event["args"]["latency_ms"])
+        for span in spans[event["args"]["trace_id"]]:
+            stages[command][span["name"]].append(span["args"]["self_ms"])
+
+    if not latencies and not timeouts:
+        print("No commands traced.")
+        return
+    print("Photon-to-motor latency per command (ms):")
+    print(
+        f"  {'command':<10}{'n':>6}{'timeout':>9}"
+        f"{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"
+    )
+    for command in sorted(set(latencies) | set(timeouts)):
+        values = latencies[command]
+        if values:
+            stats = "".join(
+                f"{v:>9.1f}"
+                for v in (
+                    percentile(values, 50),
+                    percentile(values, 90),
+                    percentile(values, 99),
+                    max(values),
+                )
+            )
+        else:
+            stats = f"{'-':>9}" * 4
+        print(f"  {command:<10}{len(values):>6}{timeouts[command]:>9}{stats}")
+    print("Median time per stage (ms, excluding nested stages):")
+    for command, by_stage in sorted(stages.items()):
+        breakdown = ", ".join(
+            f"{name} {percentile(values, 50):.1f}" for name, values in by_stage.items()
+        )
+        print(f"  {command}: {breakdown}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report latencies from a trace file")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    with open(args.path) as f:
+        print_report(json.load(f)["traceEvents"])
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""Append-only session log of frames, detections and serial traffic.
+
+A session is two files:
+
+    session.rec      records, appended in batches by a background thread
+                     (one session per file; existing recordings are refused)
+    session.rec.idx  one (timestamp, offset) entry per flushed batch
+
+Each record is a fixed header followed by its payload:
+
+    kind (1 byte) | timestamp (float64, seconds) | payload length (uint32)
+
+Frames are stored as downscaled JPEGs, everything else as UTF-8 JSON.
+The index is tiny, so a reader can jump to any point in time without
+scanning the whole recording.
+
+Usage:
+    python3 session_recorder.py session.rec            # print a summary
+    python3 session_recorder.py session.rec --at 12.5  # dump records from t+12.5 s
+"""
+import bisect
+import json
+import os
+import queue
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+
+MAGIC = b"AUTOCAR1"
+
+# record kinds
+FRAME = 1
+DETECTION = 2
+TX = 3
+RX = 4
+
+KIND_NAMES = {FRAME: "frame", DETECTION: "detection", TX: "tx", RX: "rx"}
+
+RECORD_HEADER = struct.Struct("<BdI")
+INDEX_ENTRY = struct.Struct("<dQ")
+
+
+def _json_default(value):
+    # NumPy scalars and arrays sneak in from OpenCV and YOLO results
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class SessionRecorder:
+    def __init__(
+        self,
+        path,
+        frame_width=320,
+        jpeg_quality=70,
+        batch_size=32,
+        flush_interval=0.5,
+        max_queue=256,
+    ):
+        self.path = path
+        self.frame_width = frame_width
+        self.jpeg_quality = jpeg_quality
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped_frames = 0
+        self.dropped_records = 0
+        self.failed_records = 0
+        self.write_error = None
+
+        # one session per file: appending would merge two sessions' timelines
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            raise FileExistsError(f"{path} already holds a recording")
+        self._data = open(path, "wb")
+        # an index left over from a deleted recording would point into the old data
+        self._index = open(path + ".idx", "wb")
+        self._data.write(MAGIC)
+        self._data.flush()
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._running = True
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def record_frame(self, frame, timestamp=None, copy=False):
+        """Queue a frame; dropped (and counted) if the writer falls behind.
+
+        The frame is encoded later on the writer thread, so pass copy=True
+        if the caller overwrites the array in place.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        try:
+            self._queue.put_nowait((FRAME, timestamp, frame.copy() if copy else frame))
+        except queue.Full:
+            self.dropped_frames += 1
+
+    def record_detection(self, result, timestamp=None):
+        """Queue a dict of per-frame results (person box, OCR text, ...)."""
+        self._put(DETECTION, result, timestamp)
+
+    def record_tx(self, line, timestamp=None):
+        self._put(TX, line, timestamp)
+
+    def record_rx(self, line, timestamp=None):
+        self._put(RX, line, timestamp)
+
+    def _put(self, kind, value, timestamp, timeout=0.05):
+        if timestamp is None:
+            timestamp = time.time()
+        if self.write_error is not None or not self._thread.is_alive():
+            self.dropped_records += 1
+            return
+        # commands and results get a short wait, but never stall the control loop
+        try:
+            self._queue.put((kind, timestamp, value), timeout=timeout)
+        except queue.Full:
+            self.dropped_records += 1
+
+    def _encode(self, kind, value):
+        if kind == FRAME:
+            height, width = value.shape[:2]
+            if width > self.frame_width:
+                new_height = int(height * self.frame_width / width)
+                value = cv2.resize(
+                    value, (self.frame_width, new_height), interpolation=cv2.INTER_AREA
+                )
+            ok, jpeg = cv2.imencode(
+                ".jpg", value, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+            )
+            return jpeg.tobytes() if ok else None
+        return json.dumps(value, default=_json_default).encode("utf-8")
+
+    def _writer_loop(self):
+        batch = []
+        last_flush = time.monotonic()
+        while self._running or not self._queue.empty():
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+            except queue.Empty:
+                pass
+            if self.write_error is not None:
+                batch = []  # keep draining so producers never block
+                continue
+            due = time.monotonic() - last_flush >= self.flush_interval
+            if batch and (len(batch) >= self.batch_size or due or not self._running):
+                self._write_batch(batch)
+                batch = []
+                last_flush = time.monotonic()
+        if batch and self.write_error is None:
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        # records from different threads may arrive slightly out of order
+        batch.sort(key=lambda item: item[1])
+        chunks = []
+        encoded = 0
+        for kind, timestamp, value in batch:
+            try:
+                payload = self._encode(kind, value)
+            except Exception as e:
+                if not self.failed_records:
+                    print(f"Recorder could not encode {KIND_NAMES[kind]}: {e}")
+                self.failed_records += 1
+                continue
+            if payload is None:
+                self.failed_records += 1
+                continue
+            chunks.append(RECORD_HEADER.pack(kind, timestamp, len(payload)))
+            chunks.append(payload)
+            encoded += 1
+        if not chunks:
+            return
+        try:
+            offset = self._data.tell()
+            self._data.write(b"".join(chunks))
+            self._data.flush()
+            # index the batch only once its data is on disk, never past the end
+            self._index.write(INDEX_ENTRY.pack(batch[0][1], offset))
+            self._index.flush()
+        except OSError as e:
+            # a partial batch would corrupt later records, so stop recording
+            print(f"Recorder write failed, recording stopped: {e}")
+            self.write_error = e
+            self.failed_records += encoded  # encode failures are already counted
+
+    def close(self):
+        self._running = False
+        self._thread.join()
+        for f in (self._data, self._index):
+            try:
+                f.close()
+            except OSError:
+                pass  # already reported by the writer
+        if self.dropped_frames:
+            print(f"Recorder dropped {self.dropped_frames} frames")
+        if self.dropped_records or self.failed_records:
+            print(
+                f"Recorder dropped {self.dropped_records} and failed to write "
+                f"{self.failed_records} other records"
+            )
+
+
+class SessionReader:
+    def __init__(self, path):
+        self.path = path
+        self._data = open(path, "rb")
+        if self._data.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+
+        self._times = []
+        self._offsets = []
+        if os.path.exists(path + ".idx"):
+            with open(path + ".idx", "rb") as f:
+                raw = f.read()
+            usable = len(raw) - len(raw) % INDEX_ENTRY.size
+            for timestamp, offset in INDEX_ENTRY.iter_unpack(raw[:usable]):
+                self._times.append(timestamp)
+                self._offsets.append(offset)
+
+    @property
+    def start_time(self):
+        return self._times[0] if self._times else None
+
+    def seek(self, timestamp):
+        """Position the reader at the first batch that may contain timestamp."""
+        # step back one extra batch: records queued from other threads can
+        # land in the next batch with a slightly earlier timestamp
+        i = bisect.bisect_right(self._times, timestamp) - 2
+        self._data.seek(self._offsets[i] if i >= 0 else len(MAGIC))
+
+    def records(self, start=None, end=None, kinds=None):
+        """Yield (kind, timestamp, value) between start and end (absolute seconds)."""
+        if start is not None:
+            self.seek(start)
+        else:
+            self._data.seek(len(MAGIC))
+        stop_offset = None
+        if end is not None:
+            # like seek(), allow one batch of slack past the first batch that
+            # starts after end, since neighbouring batches can overlap in time
+            j = bisect.bisect_right(self._times, end) + 1
+            if j < len(self._offsets):
+                stop_offset = self._offsets[j]
+        while stop_offset is None or self._data.tell() < stop_offset:
+            header = self._data.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return  # end of file or truncated tail after a crash
+            kind, timestamp, length = RECORD_HEADER.unpack(header)
+            if (
+                (start is not None and timestamp < start)
+                or (end is not None and timestamp > end)
+                or (kinds is not None and kind not in kinds)
+            ):
+                self._data.seek(length, os.SEEK_CUR)
+                continue
+            payload = self._data.read(length)
+            if len(payload) < length:
+                return
+            yield kind, timestamp, self._decode(kind, payload)
+
+    def frames(self, start=None, end=None):
+        for _, timestamp, frame in self.records(start, end, kinds=(FRAME,)):
+            yield timestamp, frame
+
+    def _decode(self, kind, payload):
+        if kind == FRAME:
+            return cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+        return json.loads(payload.decode("utf-8"))
+
+    def close(self):
+        self._data.close()
+
+
+def print_summary(reader):
+    counts = {}
+    first = last = None
+    for kind, timestamp, _ in reader.records(kinds=(DETECTION, TX, RX)):
+        counts[kind] = counts.get(kind, 0) + 1
+        first = timestamp if first is None else min(first, timestamp)
+        last = timestamp if last is None else max(last, timestamp)
+    frame_count = sum(1 for _ in reader.frames())
+    print(f"Recording: {reader.path}")
+    if first is not None:
+        print(f"Duration: {last - first:.1f} s")
+    print(f"Frames: {frame_count}")
+    for kind in (DETECTION, TX, RX):
+        print(f"{KIND_NAMES[kind]}: {counts.get(kind, 0)}")
+
+
+def dump_records(reader, offset, duration):
+    start = reader.start_time + offset
+    for kind, timestamp, value in reader.records(start, start + duration):
+        t = timestamp - reader.start_time
+        if kind == FRAME:
+            print(f"{t:8.3f} frame {value.shape[1]}x{value.shape[0]}")
+        else:
+            print(f"{t:8.3f} {KIND_NAMES[kind]} {value}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect a recorded car session")
+    parser.add_argument("path")
+    parser.add_argument("--at", type=float, help="seconds from start to dump from")
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    reader = SessionReader(args.path)
+    if reader.start_time is None:
+        print("Recording is empty.")
+    elif args.at is None:
+        print_summary(reader)
+    else:
+        dump_records(reader, args.at, args.duration)
+    reader.close()
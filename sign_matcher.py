@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Fast recognizer for the fixed sign vocabulary, ahead of Tesseract.
+
+The car only understands a handful of words, so instead of running general
+OCR on every frame we:
+
+  1. downscale the frame to 160x120, flatten the lighting and keep pixels
+     clearly darker than the paper around them
+  2. crop the ink of the sign and fit it, aspect preserved, into a small
+     fixed canvas
+  3. score it against every pre-rendered template in one matrix product
+     (normalised cross-correlation on flattened, zero-mean vectors)
+
+match() returns (word, score). word is None when the best score is low
+or ambiguous, or (with score None) when no lettering-like ink was found;
+in both cases the caller falls back to Tesseract.
+
+The templates are printed Hershey fonts and match none of the handwritten
+sample frames in this repo yet, so the control loop does not use the
+matcher until it is shown to fire on real signs.
+
+Usage:
+    python3 sign_matcher.py *.jpg     # match the sample images, with timings
+    python3 sign_matcher.py --selftest
+"""
+import time
+
+import cv2
+import numpy as np
+
+VOCABULARY = ["W", "A", "S", "D", "X", "FORWARD", "BACK", "LEFT", "RIGHT", "STOP"]
+
+WORK_SIZE = (160, 120)  # width, height the frame is reduced to
+CANVAS_SIZE = (96, 32)  # width, height of a normalised sign crop
+
+MIN_SCORE = 0.6
+MIN_MARGIN = 0.05  # best word must beat the runner-up by this much
+MAX_INK_RATIO = 0.9  # darkest ink must be below this fraction of the paper
+MAX_COMPONENTS = 30  # more separate blobs than this is texture, not lettering
+PAPER_KERNEL = 21  # px at working size, wider than a marker stroke
+
+
+def _normalise(binary):
+    """Fit the ink of a binary image into the canvas and flatten it."""
+    ys, xs = np.nonzero(binary)
+    if len(xs) == 0:
+        return None
+    crop = binary[ys.min() : ys.max() + 1, xs.min() : xs.max() + 1]
+    canvas_w, canvas_h = CANVAS_SIZE
+    scale = min(canvas_w / crop.shape[1], canvas_h / crop.shape[0])
+    w = max(1, int(crop.shape[1] * scale))
+    h = max(1, int(crop.shape[0] * scale))
+    canvas = np.zeros((canvas_h, canvas_w), np.float32)
+    x0, y0 = (canvas_w - w) // 2, (canvas_h - h) // 2
+    canvas[y0 : y0 + h, x0 : x0 + w] = cv2.resize(
+        crop, (w, h), interpolation=cv2.INTER_AREA
+    )
+    # soften edges so a stroke a pixel off still correlates
+    canvas = cv2.GaussianBlur(canvas, (3, 3), 0).ravel()
+    canvas -= canvas.mean()
+    norm = np.linalg.norm(canvas)
+    return canvas / norm if norm > 0 else None
+
+
+def _render(word, font, thickness, angle):
+    size = 200
+    image = np.zeros((size, size * 4), np.uint8)
+    cv2.putText(image, word, (10, 150), font, 4, 255, thickness, cv2.LINE_AA)
+    if angle:
+        center = (image.shape[1] / 2, image.shape[0] / 2)
+        rotation = cv2.getRotationMatrix2D(center, angle, 1.0)
+        image = cv2.warpAffine(image, rotation, (image.shape[1], image.shape[0]))
+    return image
+
+
+class SignMatcher:
+    def __init__(self, vocabulary=VOCABULARY, min_score=MIN_SCORE):
+        self.vocabulary = list(vocabulary)
+        self.min_score = min_score
+
+        # a few fonts, stroke widths and tilts per word stand in for the
+        # variety of hand-drawn signs
+        vectors, labels = [], []
+        for label, word in enumerate(self.vocabulary):
+            for font in (cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX):
+                for thickness in (8, 16):
+                    for angle in (-6, 0, 6):
+                        vector = _normalise(_render(word, font, thickness, angle))
+                        vectors.append(vector)
+                        labels.append(label)
+        self.templates = np.stack(vectors)  # (n_templates, canvas pixels)
+        self.labels = np.array(labels)
+
+    def find_sign(self, frame):
+        """Binary crop of the sign ink at working resolution, or None."""
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, WORK_SIZE, interpolation=cv2.INTER_AREA)
+        small = cv2.GaussianBlur(small, (3, 3), 0)
+
+        # closing wipes out thin dark strokes, leaving the paper's brightness;
+        # dividing by it removes shading so faint marker on a lit sheet
+        # still separates from the background
+        kernel = cv2.getStructuringElement(
+            cv2.MORPH_ELLIPSE, (PAPER_KERNEL, PAPER_KERNEL)
+        )
+        paper = cv2.morphologyEx(small, cv2.MORPH_CLOSE, kernel)
+        ratio = small.astype(np.float32) / np.maximum(paper, 1)
+        if ratio.min() > MAX_INK_RATIO:
+            return None  # nothing noticeably darker than its surroundings
+        flat = (np.minimum(ratio, 1.0) * 255).astype(np.uint8)
+        _, ink = cv2.threshold(flat, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+        area = WORK_SIZE[0] * WORK_SIZE[1]
+        keep = np.zeros_like(ink)
+        kept = 0
+        for i in range(1, count):
+            x, y, w, h, pixels = stats[i]
+            # signs held close are often cut off by the frame, so edge
+            # components are kept; only specks and large shadows are dropped
+            if not area * 0.001 <= pixels <= area * 0.4:
+                continue
+            keep[y : y + h, x : x + w] |= ink[y : y + h, x : x + w]
+            kept += 1
+        if kept == 0 or kept > MAX_COMPONENTS:
+            return None
+        return keep
+
+    def match(self, frame):
+        """Return (word, score); see module docstring for None cases."""
+        sign = self.find_sign(frame)
+        if sign is None:
+            return None, None
+        vector = _normalise(sign)
+        if vector is None:
+            return None, None
+
+        scores = self.templates @ vector
+        best = np.full(len(self.vocabulary), -1.0, np.float32)
+        np.maximum.at(best, self.labels, scores)
+        order = np.argsort(best)[::-1]
+        score = float(best[order[0]])
+        margin = score - float(best[order[1]])
+        if score < self.min_score or margin < MIN_MARGIN:
+            return None, score
+        return self.vocabulary[order[0]], score
+
+
+def selftest(matcher, samples=20):
+    """Match synthetic photographed-looking signs; report accuracy and speed."""
+    rng = np.random.default_rng(0)
+    correct = total = 0
+    timings = []
+    for word in matcher.vocabulary:
+        for _ in range(samples):
+            frame = np.full((480, 640), 200, np.uint8)
+            scale = rng.uniform(1.2, 2.5) if len(word) > 1 else rng.uniform(3, 6)
+            origin = (int(rng.uniform(40, 120)), int(rng.uniform(200, 300)))
+            cv2.putText(
+                frame, word, origin, cv2.FONT_HERSHEY_TRIPLEX, scale, 60,
+                int(rng.uniform(6, 14)), cv2.LINE_AA,
+            )
+            frame = cv2.GaussianBlur(frame, (9, 9), 0)
+            noise = rng.normal(0, 8, frame.shape)
+            frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+            start = time.perf_counter()
+            result, _ = matcher.match(frame)
+            timings.append(time.perf_counter() - start)
+            correct += result == word
+            total += 1
+    print(f"Synthetic signs: {correct}/{total} correct")
+    print(f"Match time: median {np.median(timings) * 1000:.2f} ms, "
+          f"max {np.max(timings) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Match images against sign templates")
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--selftest", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    matcher = SignMatcher()
+    print(f"Built {len(matcher.templates)} templates in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    if args.selftest:
+        selftest(matcher)
+    for path in args.images:
+        image = cv2.imread(path)
+        if image is None:
+            print(f"{path}: unreadable")
+            continue
+        start = time.perf_counter()
+        word, score = matcher.match(image)
+        elapsed = (time.perf_counter() - start) * 1000
+        if score is None:
+            result = "no sign found, Tesseract fallback"
+        elif word is None:
+            result = f"low confidence ({score:.2f}), Tesseract fallback"
+        else:
+            result = f"{word} ({score:.2f})"
+        print(f"{path}: {result} in {elapsed:.2f} ms")